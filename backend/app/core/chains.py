@@ -10,8 +10,8 @@ from backend.app.core.prompts import QA_PROMPT
 #     return ChatGroq(model=settings.groq_llm_name, temperature=settings.llm_temperature, api_key=settings.groq_key)
 
 # OPENAI
-def get_llm():
-    return ChatOpenAI(model=settings.openai_llm_name, temperature=settings.llm_temperature, api_key=settings.openai_key)
+def get_llm(model_name: str = settings.openai_llm_name):
+    return ChatOpenAI(model=model_name, temperature=settings.llm_temperature, api_key=settings.openai_key)
 
 def get_qa_chain(llm):
     return create_stuff_documents_chain(llm, QA_PROMPT)
@@ -6,15 +6,31 @@ class Settings(BaseSettings):
     # groq_key: str
     huggingface_key: str
     openai_llm_name: str = "gpt-4o"
+    openai_fast_llm_name: str = "gpt-4o-mini"
+    openai_rewrite_llm_name: str = "gpt-4o-mini"
     # groq_llm_name: str = "llama-3.1-8b-instant"
     llm_temperature: float = 0.1
+    routing_max_simple_words: int = 12
     database_url: str
     embeddings_name: str = "sentence-transformers/all-mpnet-base-v2"
     embeddings_dim: int = 768
     splitter_chunk_size: int = 1500
     splitter_chunk_overlap: int = 300
-    faiss_index_dir: str
+    faiss_index_dir: str  # root directory, each session gets its own sub-directory
+    corpus_dir: str = "backend/app/db/corpora"
+    relevance_gate_enabled: bool = True
+    # the gate threshold is percentile(chunk-to-chunk nearest neighbour L2 distance) * margin, in plain
+    # (not squared) L2 units, clamped to [min, max]. Embeddings are normalised, so distance = sqrt(2 - 2 * cosine):
+    # the bounds below are the distances for cosine 0.35 and 0.15.
+    relevance_gate_percentile: float = 95.0
+    relevance_gate_margin: float = 1.75
+    relevance_gate_min_threshold: float = 1.14
+    relevance_gate_max_threshold: float = 1.30
     api_base_url: str
+    session_ttl_seconds: int = 1 * 24 * 60 * 60  # matches the session cookie max age
+    session_sweep_interval_seconds: int = 15 * 60
+    session_quota_bytes: int = 50 * 1024 * 1024
+    global_quota_bytes: int = 2 * 1024 * 1024 * 1024
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -24,9 +24,18 @@ class ChatMessage(Base):
     session_id = Column(String, index=True)
     role = Column(String)  # 'human' or 'ai'
     content = Column(Text)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     
     
+class ChatSession(Base):
+    __tablename__ = "chat_sessions"
+
+    session_id = Column(String, primary_key=True)
+    corpus_name = Column(String, nullable=True)  # shared snapshot attached read-only
+    corpus_version = Column(String, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
 # create tables
 Base.metadata.create_all(bind=engine)
 
@@ -70,6 +79,23 @@ class SQLiteChatMessageHistory(BaseChatMessageHistory):
         self.db.close()
 
 
+def save_chat_session(session_id: str, corpus_name: str | None = None, corpus_version: str | None = None) -> None:
+    db: Session = SessionLocal()
+    try:
+        db.merge(ChatSession(session_id=session_id, corpus_name=corpus_name, corpus_version=corpus_version))
+        db.commit()
+    finally:
+        db.close()
+
+
+def get_chat_session(session_id: str) -> ChatSession | None:
+    db: Session = SessionLocal()
+    try:
+        return db.get(ChatSession, session_id)
+    finally:
+        db.close()
+
+
 def get_db():
     db = SessionLocal()
     try:
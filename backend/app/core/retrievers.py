@@ -1,17 +1,71 @@
+import math
+from typing import List
 from langchain.chains import create_history_aware_retriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
 from backend.app.core.prompts import CONTEXTUALIZE_Q_PROMPT
 
+SEARCH_K = 5
+
+
+class MergedSemanticRetriever(BaseRetriever):
+    """search several FAISS stores (e.g. a shared corpus and a session overlay) and keep the closest chunks"""
+    vector_stores: list
+    k: int = SEARCH_K
+    # embeddings already computed for this turn (e.g. by the relevance gate), keyed by query text
+    query_embeddings: dict = {}
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        # embed once, then reuse the vector for every store
+        query_embedding = self.query_embeddings.get(query)
+        if query_embedding is None:
+            query_embedding = self.vector_stores[0].embeddings.embed_query(query)
+
+        scored_docs = []
+        for vector_store in self.vector_stores:
+            scored_docs.extend(
+                vector_store.similarity_search_with_score_by_vector(query_embedding, k=self.k)
+            )
+
+        # all stores use L2 distance over the same embeddings, so lower is closer
+        scored_docs.sort(key=lambda doc_and_score: doc_and_score[1])
+        return [doc for doc, _ in scored_docs[:self.k]]
 
-def get_semantic_retriever(vector_store):
-    semantic_retriever = vector_store.as_retriever(
-       search_type="similarity",
-       search_kwargs={"k": 5}
-    )
 
-    return semantic_retriever
+def get_semantic_retriever(vector_store, corpus_store=None, query_embeddings: dict | None = None):
+    vector_stores = [store for store in (corpus_store, vector_store) if store is not None]
+    return MergedSemanticRetriever(vector_stores=vector_stores, query_embeddings=query_embeddings or {})
+
+
+def passes_relevance_gate(gated_stores: list[tuple], query_embeddings: list) -> tuple[bool, float | None, float | None]:
+    """check whether any store holds a chunk within its calibrated threshold for any of the query embeddings
+
+    returns (passed, best distance, threshold of the store it came from)
+    """
+    # an uncalibrated store cannot be gated
+    if any(threshold is None for _, threshold in gated_stores):
+        return True, None, None
+
+    best_distance, best_threshold = None, None
+    for vector_store, threshold in gated_stores:
+        for query_embedding in query_embeddings:
+            hits = vector_store.similarity_search_with_score_by_vector(query_embedding, k=1)
+            if not hits:
+                continue
+            # FAISS scores are squared L2, thresholds are calibrated on plain L2
+            distance = math.sqrt(float(hits[0][1]))
+            # compare margins since each store has its own threshold
+            if best_distance is None or distance - threshold < best_distance - best_threshold:
+                best_distance, best_threshold = distance, threshold
+
+    passed = best_distance is not None and best_distance <= best_threshold
+    return passed, best_distance, best_threshold
 
 
 def get_history_aware_retriever(llm, semantic_retriever):
     return create_history_aware_retriever(
         llm, semantic_retriever, CONTEXTUALIZE_Q_PROMPT
-    )
\ No newline at end of file
+    )
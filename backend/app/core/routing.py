@@ -0,0 +1,41 @@
+import re
+from backend.app.core.config import settings
+
+ROUTE_FAST = "fast"
+ROUTE_HEAVY = "heavy"
+
+# turns that are nothing but a greeting/acknowledgement, e.g. "hi there!" or "thanks a lot."
+GREETING_PATTERN = re.compile(
+    r"^\s*(hi|hello|hey|thanks|thank you|ok|okay|bye|goodbye|good (morning|afternoon|evening))"
+    r"(\s+(there|all|everyone|so much|a lot))?[\s!.,]*$",
+    re.IGNORECASE,
+)
+
+# words that usually signal reasoning over several passages
+COMPLEX_KEYWORDS = {
+    "why", "how", "explain", "compare", "comparison", "difference", "differences",
+    "analyze", "analyse", "analysis", "summarize", "summarise", "summary",
+    "evaluate", "implications", "pros", "cons", "relationship", "impact",
+}
+
+
+def is_greeting(query: str) -> bool:
+    return bool(GREETING_PATTERN.match(query))
+
+
+def classify_query(query: str) -> str:
+    """route a user turn to the fast or heavy model using cheap local heuristics"""
+    words = re.findall(r"[a-zA-Z']+", query.lower())
+
+    if len(words) > settings.routing_max_simple_words:
+        return ROUTE_HEAVY
+
+    # multiple questions in one turn
+    if query.count("?") > 1:
+        return ROUTE_HEAVY
+
+    if COMPLEX_KEYWORDS.intersection(words):
+        return ROUTE_HEAVY
+
+    # short lookups and greetings
+    return ROUTE_FAST
@@ -0,0 +1,128 @@
+import os
+import shutil
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from backend.app.core.config import settings
+from backend.app.core.database import SessionLocal, ChatMessage, ChatSession
+from backend.app.core.vectorstore import get_session_index_dir, is_valid_session_id
+
+logger = logging.getLogger(__name__)
+
+# the background sweeper and upload-triggered sweeps must not run concurrently
+_sweep_lock = threading.Lock()
+
+
+def get_dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                total += os.path.getsize(os.path.join(root, file))
+            except OSError:
+                continue  # removed while walking
+    return total
+
+
+def list_session_index_dirs() -> dict[str, str]:
+    if not os.path.isdir(settings.faiss_index_dir):
+        return {}
+    # only session namespaces, never other data that may share the directory
+    return {
+        name: os.path.join(settings.faiss_index_dir, name)
+        for name in os.listdir(settings.faiss_index_dir)
+        if is_valid_session_id(name) and os.path.isdir(os.path.join(settings.faiss_index_dir, name))
+    }
+
+
+def evict_session_index(session_id: str) -> int:
+    """remove a session's uploaded documents index, returning the bytes reclaimed"""
+    # older builds stored raw cookie values in chat_messages; those never had an index directory
+    if not is_valid_session_id(session_id):
+        return 0
+    index_dir = get_session_index_dir(session_id)
+    if not os.path.isdir(index_dir):
+        return 0
+    reclaimed_bytes = get_dir_size(index_dir)
+    shutil.rmtree(index_dir, ignore_errors=True)
+    return reclaimed_bytes
+
+
+def evict_session(db: Session, session_id: str) -> tuple[int, int]:
+    """remove a session's index, chat history and session row, returning (index bytes reclaimed, messages deleted)"""
+    reclaimed_bytes = evict_session_index(session_id)
+
+    # deleted rows don't shrink the SQLite file until a VACUUM, so history is counted in messages, not bytes
+    deleted_messages = db.query(ChatMessage).filter(ChatMessage.session_id == session_id).delete()
+    db.query(ChatSession).filter(ChatSession.session_id == session_id).delete()
+    db.commit()
+
+    return reclaimed_bytes, deleted_messages
+
+
+def get_session_ages(db: Session, index_dirs: dict[str, str]) -> dict[str, datetime]:
+    """creation time of every known session, falling back to index/history timestamps for older sessions"""
+    ages = {
+        row.session_id: row.created_at.replace(tzinfo=timezone.utc)
+        for row in db.query(ChatSession).all()
+    }
+    for session_id, path in index_dirs.items():
+        if session_id not in ages:
+            ages[session_id] = datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc)
+    history = db.query(ChatMessage.session_id, func.max(ChatMessage.created_at)).group_by(ChatMessage.session_id)
+    for session_id, last_message_at in history:
+        if session_id not in ages and last_message_at:
+            ages[session_id] = last_message_at.replace(tzinfo=timezone.utc)
+    return ages
+
+
+def sweep_sessions(protected_session_id: str | None = None) -> dict:
+    """evict sessions past the TTL, then the oldest session indexes until the global quota is met"""
+    with _sweep_lock:
+        return _sweep_sessions(protected_session_id)
+
+
+def _sweep_sessions(protected_session_id: str | None = None) -> dict:
+    db: Session = SessionLocal()
+    try:
+        index_dirs = list_session_index_dirs()
+        ages = get_session_ages(db, index_dirs)
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.session_ttl_seconds)
+
+        expired = [session_id for session_id, created_at in ages.items() if created_at < cutoff]
+        reclaimed_bytes = deleted_messages = 0
+        for session_id in expired:
+            session_bytes, session_messages = evict_session(db, session_id)
+            reclaimed_bytes += session_bytes
+            deleted_messages += session_messages
+
+        # global quota covers the session indexes, evict oldest first; live sessions keep
+        # their history and corpus attachment until the TTL and only lose their uploads
+        quota_evicted = []
+        sizes = {
+            session_id: get_dir_size(path)
+            for session_id, path in list_session_index_dirs().items()
+        }
+        total_bytes = sum(sizes.values())
+        for session_id in sorted(sizes, key=lambda session_id: ages.get(session_id, cutoff)):
+            if total_bytes <= settings.global_quota_bytes:
+                break
+            if session_id == protected_session_id:
+                continue
+            total_bytes -= sizes[session_id]
+            reclaimed_bytes += evict_session_index(session_id)
+            quota_evicted.append(session_id)
+
+        report = {
+            "expired_sessions": len(expired),
+            "quota_evicted_indexes": len(quota_evicted),
+            "reclaimed_bytes": reclaimed_bytes,
+            "deleted_messages": deleted_messages,
+            "index_bytes": total_bytes,
+        }
+        logger.info(f"Session sweep: {report}")
+        return report
+    finally:
+        db.close()
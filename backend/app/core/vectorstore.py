@@ -1,17 +1,24 @@
 import os
+import json
+import logging
+import re
 import tempfile
+from datetime import datetime, timezone
 from langchain_community.document_loaders import PyPDFLoader
 import io
 from langchain_community.embeddings import HuggingFaceInferenceAPIEmbeddings
 from backend.app.core.config import settings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 import faiss
+import numpy as np
 from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
 from langchain.schema import Document
-from uuid import uuid4
+from uuid import uuid4, UUID
 
 
+logger = logging.getLogger(__name__)
+
 embeddings = HuggingFaceInferenceAPIEmbeddings(
     api_key=settings.huggingface_key,
     model_name=settings.embeddings_name,
@@ -40,9 +47,7 @@ def process_document(source_type: str, content: io.BytesIO):
         os.unlink(temp_file_path)
         
 
-def create_vectorstore_from_documents(
-    documents: list[dict]
-):
+def split_documents(documents: list[dict]):
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=settings.splitter_chunk_size,
         chunk_overlap=settings.splitter_chunk_overlap,
@@ -58,9 +63,10 @@ def create_vectorstore_from_documents(
         chunks = text_splitter.split_documents(docs)
         all_chunks.extend(chunks)
 
-    if not all_chunks:
-        return None  # Return None if no chunks were created
+    return all_chunks
 
+
+def build_vectorstore(chunks):
     index = faiss.IndexFlatL2(settings.embeddings_dim) # 768 is the dimension for sentence-transformers/all-mpnet-base-v2 model
 
     faiss_vectorstore = FAISS(
@@ -71,17 +77,222 @@ def create_vectorstore_from_documents(
     )
     
     # random UUIDs for each chunk
-    uuids = [str(uuid4()) for _ in range(len(all_chunks))]
+    uuids = [str(uuid4()) for _ in range(len(chunks))]
     
     # add documents with their IDs
-    returned_ids = faiss_vectorstore.add_documents(documents=all_chunks, ids=uuids)
-    
-    faiss_vectorstore.save_local(settings.faiss_index_dir)
+    returned_ids = faiss_vectorstore.add_documents(documents=chunks, ids=uuids)
 
     return faiss_vectorstore
 
 
-def get_vector_store():
-    load_vector_store = FAISS.load_local(settings.faiss_index_dir, embeddings, allow_dangerous_deserialization=True)
+RELEVANCE_FILE = "relevance.json"
+RELEVANCE_CALIBRATION_SAMPLE = 1000
+RELEVANCE_METRIC = "l2"  # plain euclidean distance, as compared by the relevance gate
+
+
+def calibrate_relevance_threshold(faiss_vectorstore) -> float | None:
+    """derive the relevance gate threshold from chunk-to-chunk nearest neighbour distances"""
+    index = faiss_vectorstore.index
+    if index.ntotal < 2:
+        return None  # nothing to calibrate against, leave the gate open
+
+    # flat search is quadratic, so calibrate on a fixed sample of chunks
+    sample_size = min(index.ntotal, RELEVANCE_CALIBRATION_SAMPLE)
+    sample_ids = np.random.default_rng(0).choice(index.ntotal, sample_size, replace=False)
+    vectors = np.vstack([index.reconstruct(int(i)) for i in sample_ids])
+
+    # the first hit is the chunk itself, the second its nearest neighbour;
+    # IndexFlatL2 returns squared distances, so take the root before scaling by the margin
+    distances, _ = index.search(vectors, 2)
+    nearest_distances = np.sqrt(distances[:, 1])
+
+    threshold = float(np.percentile(nearest_distances, settings.relevance_gate_percentile) * settings.relevance_gate_margin)
+
+    # tightly overlapping uploads would reject answerable questions, outlier chunks would never close the gate
+    clamped_threshold = clamp_relevance_threshold(threshold)
+    if clamped_threshold != threshold:
+        logger.warning(
+            f"Calibrated relevance threshold {threshold:.3f} clamped to {clamped_threshold:.3f} "
+            f"({index.ntotal} chunks)"
+        )
+    return clamped_threshold
+
+
+def clamp_relevance_threshold(threshold: float) -> float:
+    return min(max(threshold, settings.relevance_gate_min_threshold), settings.relevance_gate_max_threshold)
+
+
+def save_vectorstore(faiss_vectorstore, index_dir: str) -> float | None:
+    faiss_vectorstore.save_local(index_dir)
+
+    relevance_threshold = calibrate_relevance_threshold(faiss_vectorstore)
+    with open(os.path.join(index_dir, RELEVANCE_FILE), "w") as f:
+        json.dump({"threshold": relevance_threshold, "metric": RELEVANCE_METRIC}, f)
+
+    return relevance_threshold
+
+
+def load_relevance_threshold(index_dir: str) -> float | None:
+    # indexes saved before calibration existed have no threshold
+    relevance_path = os.path.join(index_dir, RELEVANCE_FILE)
+    if not os.path.exists(relevance_path):
+        return None
+    with open(relevance_path) as f:
+        relevance = json.load(f)
+    # thresholds from older builds were in squared distance units, leave those indexes ungated
+    if relevance.get("metric") != RELEVANCE_METRIC or relevance["threshold"] is None:
+        return None
+    # re-apply the bounds in case they changed since the index was calibrated
+    return clamp_relevance_threshold(relevance["threshold"])
+
+
+class QuotaExceededError(ValueError):
+    pass
+
+
+def is_valid_session_id(session_id: str) -> bool:
+    # session ids name index directories, so only accept the UUIDs issued by /chat/init
+    try:
+        UUID(session_id)
+    except ValueError:
+        return False
+    return True
+
+
+def get_session_index_dir(session_id: str) -> str:
+    if not is_valid_session_id(session_id):
+        raise ValueError(f"Invalid session id: {session_id!r}")
+    return os.path.join(settings.faiss_index_dir, session_id)
+
+
+def estimate_index_bytes(chunks) -> int:
+    # float32 vectors plus the pickled chunk text
+    return sum(settings.embeddings_dim * 4 + len(chunk.page_content.encode()) for chunk in chunks)
+
+
+def create_vectorstore_from_documents(
+    documents: list[dict],
+    session_id: str
+):
+    all_chunks = split_documents(documents)
+    if not all_chunks:
+        return None  # Return None if no chunks were created
+
+    # reject before paying for the embeddings
+    estimated_bytes = estimate_index_bytes(all_chunks)
+    if estimated_bytes > settings.session_quota_bytes:
+        raise QuotaExceededError(
+            f"Documents need about {estimated_bytes} bytes of index storage, "
+            f"the per-session quota is {settings.session_quota_bytes} bytes"
+        )
+
+    faiss_vectorstore = build_vectorstore(all_chunks)
+    save_vectorstore(faiss_vectorstore, get_session_index_dir(session_id))
+
+    return faiss_vectorstore
+
+
+def get_vector_store(session_id: str):
+    index_dir = get_session_index_dir(session_id)
+
+    # no documents uploaded to this session yet
+    if not os.path.exists(os.path.join(index_dir, "index.faiss")):
+        return None
+
+    load_vector_store = FAISS.load_local(index_dir, embeddings, allow_dangerous_deserialization=True)
+
+    return load_vector_store
+
+
+### CORPUS SNAPSHOTS
+
+CORPUS_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+# loaded snapshots are shared read-only by every session attached to them
+_corpus_cache: dict[tuple[str, str], FAISS] = {}
+
+
+def is_valid_corpus_name(name: str) -> bool:
+    return bool(CORPUS_NAME_PATTERN.match(name))
+
+
+def create_corpus_snapshot(name: str, documents: list[dict]):
+    all_chunks = split_documents(documents)
+    if not all_chunks:
+        return None
+
+    version = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S%f")
+    snapshot_dir = os.path.join(settings.corpus_dir, name, version)
+
+    # never overwrite a snapshot that sessions may already have cached
+    try:
+        os.makedirs(snapshot_dir)
+    except FileExistsError:
+        raise ValueError(f"Corpus snapshot {name}@{version} already exists")
+
+    faiss_vectorstore = build_vectorstore(all_chunks)
+    relevance_threshold = save_vectorstore(faiss_vectorstore, snapshot_dir)
+
+    metadata = {
+        "name": name,
+        "version": version,
+        "embeddings_name": settings.embeddings_name,
+        "num_chunks": len(all_chunks),
+        "relevance_threshold": relevance_threshold,
+    }
+    with open(os.path.join(snapshot_dir, "corpus.json"), "w") as f:
+        json.dump(metadata, f)
+
+    _corpus_cache[(name, version)] = faiss_vectorstore
+    return metadata
+
+
+def list_corpus_versions(name: str) -> list[str]:
+    corpus_path = os.path.join(settings.corpus_dir, name)
+    if not os.path.isdir(corpus_path):
+        return []
+    # versions are UTC timestamps, so lexical order is chronological
+    return sorted(
+        version for version in os.listdir(corpus_path)
+        if os.path.exists(os.path.join(corpus_path, version, "corpus.json"))
+    )
+
+
+def list_corpora() -> list[dict]:
+    if not os.path.isdir(settings.corpus_dir):
+        return []
+    corpora = []
+    for name in sorted(os.listdir(settings.corpus_dir)):
+        for version in list_corpus_versions(name):
+            with open(os.path.join(settings.corpus_dir, name, version, "corpus.json")) as f:
+                corpora.append(json.load(f))
+    return corpora
+
+
+def resolve_corpus_version(name: str, version: str | None = None) -> str | None:
+    versions = list_corpus_versions(name)
+    if not versions:
+        return None
+    if version is None:
+        return versions[-1]
+    return version if version in versions else None
+
+
+def get_corpus_relevance_threshold(name: str, version: str) -> float | None:
+    return load_relevance_threshold(os.path.join(settings.corpus_dir, name, version))
+
+
+def get_corpus_snapshot(name: str, version: str):
+    key = (name, version)
+    if key not in _corpus_cache:
+        snapshot_dir = os.path.join(settings.corpus_dir, name, version)
+        with open(os.path.join(snapshot_dir, "corpus.json")) as f:
+            metadata = json.load(f)
+        if metadata["embeddings_name"] != settings.embeddings_name:
+            raise ValueError(
+                f"Corpus {name}@{version} was built with {metadata['embeddings_name']}, "
+                f"but the configured embeddings model is {settings.embeddings_name}"
+            )
+        _corpus_cache[key] = FAISS.load_local(snapshot_dir, embeddings, allow_dangerous_deserialization=True)
 
-    return load_vector_store
\ No newline at end of file
+    return _corpus_cache[key]
@@ -1,8 +1,34 @@
 from fastapi import FastAPI, responses
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+from backend.app.core.config import settings
+from backend.app.core.sessions import sweep_sessions
 from backend.app.routes import store, chat, others
 
+logger = logging.getLogger(__name__)
+
+
+async def run_session_sweeper():
+    while True:
+        try:
+            await asyncio.to_thread(sweep_sessions)
+        except Exception as e:
+            logger.error(f"Error sweeping sessions: {e}")
+        await asyncio.sleep(settings.session_sweep_interval_seconds)
+
+
+# evict expired session indexes and history in the background
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sweeper = asyncio.create_task(run_session_sweeper())
+    yield
+    sweeper.cancel()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="docAI",
     summary="Your best document AI assistant",
     version="0.1.0",
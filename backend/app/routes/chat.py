@@ -2,41 +2,60 @@ from fastapi import APIRouter, HTTPException, Request, Depends, Response
 from sqlalchemy.orm import Session
 import logging
 from uuid import uuid4
-from backend.app.core.vectorstore import get_vector_store
+from backend.app.core.vectorstore import embeddings, get_vector_store, get_session_index_dir, is_valid_session_id
+from backend.app.core.vectorstore import get_corpus_snapshot, resolve_corpus_version, is_valid_corpus_name
+from backend.app.core.vectorstore import get_corpus_relevance_threshold, load_relevance_threshold
 from backend.app.core.chains import get_rag_chain, get_llm, get_qa_chain
-from backend.app.core.retrievers import get_semantic_retriever, get_history_aware_retriever
-from backend.app.core.database import get_db, SQLiteChatMessageHistory
+from backend.app.core.retrievers import get_semantic_retriever, get_history_aware_retriever, passes_relevance_gate
+from backend.app.core.database import get_db, SQLiteChatMessageHistory, save_chat_session, get_chat_session
+from backend.app.core.routing import classify_query, is_greeting, ROUTE_FAST
+from backend.app.core.prompts import OUT_OF_CONTEXT_RESPONSE
+from backend.app.core.config import settings
+from langchain_community.callbacks import OpenAICallbackHandler
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from pydantic import BaseModel
-from langchain.schema import HumanMessage
-import shutil
-import os
+from langchain.schema import HumanMessage, AIMessage
+import time
 
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
 llm = get_llm()
+fast_llm = get_llm(settings.openai_fast_llm_name)
+rewrite_llm = get_llm(settings.openai_rewrite_llm_name)
 
 COOKIE_NAME = "session_id"
-COOKIE_MAX_AGE = 1 * 24 * 60 * 60  # 1 days in seconds
+COOKIE_MAX_AGE = settings.session_ttl_seconds  # sessions are swept once the cookie expires
 
 class ChatQuery(BaseModel):
     query: str
+
+
+class ChatInit(BaseModel):
+    corpus: str | None = None
+    corpus_version: str | None = None
     
     
 @router.post("/init")
-async def initialize_session(response: Response) -> dict:
+async def initialize_session(response: Response, chat_init: ChatInit | None = None) -> dict:
     try:
         # random session_id
         session_id = str(uuid4())
+
+        # attach a prebuilt corpus snapshot (read-only, shared across sessions)
+        corpus_name = corpus_version = None
+        if chat_init and chat_init.corpus:
+            corpus_name = chat_init.corpus
+            if not is_valid_corpus_name(corpus_name):
+                raise HTTPException(status_code=400, detail=f"Invalid corpus name: {corpus_name}")
+            corpus_version = resolve_corpus_version(corpus_name, chat_init.corpus_version)
+            if not corpus_version:
+                raise HTTPException(status_code=404, detail=f"Corpus not found: {corpus_name}")
+            # warm the in-memory cache so the first query does no loading
+            get_corpus_snapshot(corpus_name, corpus_version)
+        save_chat_session(session_id, corpus_name, corpus_version)
         
-        # remove existing FAISS index (reason: not persisting vector store for a long time, rather for only the current session)
-        faiss_index_path = "app/db/faiss_index"
-        if os.path.exists(faiss_index_path):
-            shutil.rmtree(faiss_index_path)
-            os.makedirs(faiss_index_path)
-            
         # save the session_id in cookies
         response.set_cookie(
             key=COOKIE_NAME,
@@ -46,7 +65,14 @@ async def initialize_session(response: Response) -> dict:
             samesite="strict"
         )
         
-        return {"message": "New session initialized", "session_id": session_id}
+        return {
+            "message": "New session initialized",
+            "session_id": session_id,
+            "corpus": corpus_name,
+            "corpus_version": corpus_version
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error initializing session: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -59,6 +85,8 @@ def get_session_id(request: Request) -> str:
             status_code=401,
             detail="No session found. Please initialize a session first."
         )
+    if not is_valid_session_id(session_id):
+        raise HTTPException(status_code=401, detail="Invalid session. Please initialize a session first.")
     return session_id
 
 
@@ -71,14 +99,58 @@ async def chat_query(
     try:
         session_id = get_session_id(request)
         
-        # load vector store
-        vector_store = get_vector_store()
-        if not vector_store:
-            raise HTTPException(status_code=404, detail="Vector store not found")
+        # load the session overlay and the attached corpus snapshot (if any)
+        vector_store = get_vector_store(session_id)
+        chat_session = get_chat_session(session_id)
+        corpus_store = None
+        if chat_session and chat_session.corpus_name:
+            corpus_store = get_corpus_snapshot(chat_session.corpus_name, chat_session.corpus_version)
+        if not vector_store and not corpus_store:
+            raise HTTPException(status_code=404, detail="No documents found for this session. Please upload your documents again.")
+
+        # answer out-of-context questions directly when no chunk is close enough (skips both LLM calls);
+        # only turns that are nothing but a greeting bypass the gate, "thanks, <question>" is still gated
+        query_embeddings = {}
+        if settings.relevance_gate_enabled and not is_greeting(chat_query.query):
+            gated_stores = []
+            if vector_store:
+                gated_stores.append((vector_store, load_relevance_threshold(get_session_index_dir(session_id))))
+            if corpus_store:
+                gated_stores.append((corpus_store, get_corpus_relevance_threshold(chat_session.corpus_name, chat_session.corpus_version)))
+
+            # follow-ups may only make sense next to the previous question
+            chat_history = SQLiteChatMessageHistory(session_id=session_id)
+            previous_questions = [msg.content for msg in chat_history.messages if isinstance(msg, HumanMessage)]
+            gate_queries = [chat_query.query]
+            if previous_questions:
+                gate_queries.append(f"{previous_questions[-1]} {chat_query.query}")
+
+            # one embedding call, reused by the retriever when the question needs no rewrite
+            query_embeddings = dict(zip(gate_queries, embeddings.embed_documents(gate_queries)))
+            passed, best_distance, threshold = passes_relevance_gate(gated_stores, list(query_embeddings.values()))
+            logger.info(f"relevance_gate passed={passed} best_distance={best_distance} threshold={threshold}")
+
+            if not passed:
+                chat_history.add_message(HumanMessage(content=chat_query.query))
+                chat_history.add_message(AIMessage(content=OUT_OF_CONTEXT_RESPONSE))
+                return {
+                    "session_id": session_id,
+                    "response": OUT_OF_CONTEXT_RESPONSE
+                }
                      
-        semantic_retriever = get_semantic_retriever(vector_store)
-        history_aware_retriever = get_history_aware_retriever(llm, semantic_retriever)
-        qa_chain = get_qa_chain(llm)
+        # send simple turns to the fast model, everything else to the heavy one
+        route = classify_query(chat_query.query)
+        answer_llm = fast_llm if route == ROUTE_FAST else llm
+
+        # count tokens per model so the rewrite and answer usage can be tuned separately
+        rewrite_usage = OpenAICallbackHandler()
+        answer_usage = OpenAICallbackHandler()
+
+        semantic_retriever = get_semantic_retriever(vector_store, corpus_store, query_embeddings)
+        history_aware_retriever = get_history_aware_retriever(
+            rewrite_llm.with_config(callbacks=[rewrite_usage]), semantic_retriever
+        )
+        qa_chain = get_qa_chain(answer_llm.with_config(callbacks=[answer_usage]))
         rag_chain = get_rag_chain(history_aware_retriever, qa_chain)
         
         def get_session_history(session_id: str) -> SQLiteChatMessageHistory:
@@ -92,10 +164,20 @@ async def chat_query(
             output_messages_key="answer",
         )
         
+        start_time = time.perf_counter()
         result = conversational_rag_chain.invoke(
             {"input": chat_query.query},
             config={"configurable": {"session_id": session_id}}
         )
+        latency_ms = (time.perf_counter() - start_time) * 1000
+
+        logger.info(
+            f"route={route} latency_ms={latency_ms:.0f} "
+            f"rewrite_model={rewrite_llm.model_name} rewrite_prompt_tokens={rewrite_usage.prompt_tokens} "
+            f"rewrite_completion_tokens={rewrite_usage.completion_tokens} "
+            f"answer_model={answer_llm.model_name} answer_prompt_tokens={answer_usage.prompt_tokens} "
+            f"answer_completion_tokens={answer_usage.completion_tokens}"
+        )
 
         if 'answer' not in result:
             logger.error("No 'answer' found in the response from RAG chain")
@@ -108,6 +190,8 @@ async def chat_query(
             "response": response
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in chat query: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -3,9 +3,11 @@
 from fastapi import APIRouter, HTTPException, Request, Depends
 from sqlalchemy.orm import Session
 import logging
+import asyncio
 from backend.app.core.database import get_db, SQLiteChatMessageHistory
 from langchain.schema import HumanMessage
 from backend.app.routes.chat import get_session_id
+from backend.app.core.sessions import sweep_sessions
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/misc", tags=["Misc"])
@@ -83,4 +85,13 @@ async def clear_current_chat_history(
         return {"message": f"Chat history cleared for session {session_id}"}
     except Exception as e:
         logger.error(f"Error clearing chat history: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/sweep")
+async def sweep_expired_sessions() -> dict:
+    try:
+        return await asyncio.to_thread(sweep_sessions)
+    except Exception as e:
+        logger.error(f"Error sweeping sessions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, File, HTTPException, UploadFile,Request
 from typing import List
 import os
-from backend.app.core.vectorstore import create_vectorstore_from_documents
+from backend.app.core.vectorstore import create_vectorstore_from_documents, QuotaExceededError
+from backend.app.core.vectorstore import create_corpus_snapshot, list_corpora, is_valid_corpus_name
+from backend.app.core.sessions import sweep_sessions
 import io
+import asyncio
 import logging
 from fastapi.responses import JSONResponse
 from backend.app.routes.chat import get_session_id
@@ -12,6 +15,21 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/store", tags=["Document Store"])
 
 
+async def read_sources(files: List[UploadFile]) -> list[dict]:
+    sources = []
+    for file in files:
+        file_extension = os.path.splitext(file.filename)[1].lower()
+        if file_extension == ".pdf":
+            content = await file.read()
+            sources.append({"type": "pdf", "content": io.BytesIO(content)})
+        else:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported file type: {file.filename}"
+            )
+    return sources
+
+
 @router.post("/upload")
 async def upload_documents(
     request: Request,
@@ -21,27 +39,56 @@ async def upload_documents(
         session_id = get_session_id(request)
                 
         # process pdf documents
-        sources = []
-        for file in files:
-            file_extension = os.path.splitext(file.filename)[1].lower()
-            if file_extension == ".pdf":
-                content = await file.read()
-                sources.append({"type": "pdf", "content": io.BytesIO(content)})
-            else:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Unsupported file type: {file.filename}"
-                )
+        sources = await read_sources(files)
                 
         # create vector store
-        vectorstore = create_vectorstore_from_documents(sources)
+        vectorstore = create_vectorstore_from_documents(sources, session_id)
         if vectorstore:
+            # make room under the global quota without touching this session
+            await asyncio.to_thread(sweep_sessions, session_id)
             return JSONResponse({"message": "Vector store created successfully", "session_id": session_id})
         else:
             return JSONResponse(
                 {"message": "No content could be extracted from the documents. Please upload valid PDF files."},
                 status_code=400
             )
+    except QuotaExceededError as e:
+        logger.error(f"Session storage quota exceeded: {e}")
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"Error in creating vector store: {e}")
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/corpus/{name}")
+async def create_corpus(
+    name: str,
+    files: List[UploadFile] = File(...)
+) -> dict:
+    try:
+        if not is_valid_corpus_name(name):
+            raise HTTPException(status_code=400, detail=f"Invalid corpus name: {name}")
+
+        sources = await read_sources(files)
+
+        # build a new versioned snapshot; sessions attach to it at /chat/init
+        corpus = create_corpus_snapshot(name, sources)
+        if corpus:
+            return JSONResponse({"message": "Corpus snapshot created successfully", **corpus})
+        else:
+            return JSONResponse(
+                {"message": "No content could be extracted from the documents. Please upload valid PDF files."},
+                status_code=400
+            )
+    except Exception as e:
+        logger.error(f"Error in creating corpus snapshot: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/corpus")
+async def get_corpora() -> dict:
+    try:
+        return {"corpora": list_corpora()}
+    except Exception as e:
+        logger.error(f"Error listing corpora: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
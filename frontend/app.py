@@ -13,17 +13,23 @@ load_dotenv()
 # API_BASE_URL = "http://localhost:8000"
 API_BASE_URL = os.environ.get("API_BASE_URL")
 
+# optional prebuilt corpus snapshot to attach to every new session
+CORPUS_NAME = os.environ.get("CORPUS_NAME")
+
 class ChatSession:
     def __init__(self):
         self.session_cookie = None
         self.initialized = False
+        self.corpus = None
 
     async def initialize(self):
         """new chat session"""
         try:
-            response = requests.post(f"{API_BASE_URL}/chat/init")
+            payload = {"corpus": CORPUS_NAME} if CORPUS_NAME else None
+            response = requests.post(f"{API_BASE_URL}/chat/init", json=payload)
             if response.status_code == 200:
                 self.session_cookie = response.cookies.get_dict()
+                self.corpus = response.json().get("corpus")
                 self.initialized = True
                 return True
             return False
@@ -168,7 +174,14 @@ async def start():
     """initialize chat session when a new chat starts."""
     # Session init
     success = await chat_session.initialize()
-    if success:
+    if success and chat_session.corpus:
+        # documents are already indexed, so don't block on an upload
+        await cl.Message(
+            content=f"Welcome! You are chatting with the {chat_session.corpus} documents. "
+                    "You can optionally attach PDFs to your messages.",
+            author="Assistant"
+        ).send()
+    elif success:
         files = await cl.AskFileMessage(
             content="Welcome! You can now upload PDF documents and start chatting.",
             accept=["application/pdf"],